@@ -1,30 +1,181 @@
 from flask import Flask, render_template, request, redirect, url_for, session, g, jsonify
+import os
+import queue
 import sqlite3
-from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
 from datetime import datetime
 
 app = Flask(__name__)
 app.secret_key = "super_secret_key_here"  # replace with environment variable for production
 DATABASE = "namesprouts.db"
 
+# PBKDF2 iteration count for new password hashes. Tunable because hash
+# verification dominates /login CPU; stored hashes embed their own count,
+# so existing users keep verifying regardless of this setting.
+PBKDF2_ITER = int(os.environ.get("PBKDF2_ITER", 260_000))
+HASH_METHOD = f"pbkdf2:sha256:{PBKDF2_ITER}"
 
-# ---------------- Database Helpers ---------------- #
+# Form-field vocabularies, enforced with one compiled-regex match per
+# field (compiled lazily and cached by _rx) instead of strip/truthiness
+# chains. Kept as pattern strings so re itself stays a deferred import.
+USERNAME_PATTERN = r"\A[A-Za-z0-9_.-]{1,32}\Z"
+EMAIL_PATTERN = r"\A[^@\s]+@[^@\s]+\.[^@\s]+\Z"
+
+
+@lru_cache(maxsize=1)
+def _hashers():
+    """Import werkzeug.security on first use.
+
+    It drags in hashlib/hmac/secrets, which routes like /design GET never
+    need, so each worker defers that import until an auth route runs.
+    """
+    from werkzeug.security import generate_password_hash, check_password_hash
+    return generate_password_hash, check_password_hash
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash():
+    """Hash verified against on the unknown-username branch of /login.
+
+    Built once at the same cost as real hashes so a failed attempt takes
+    the same wall time whether or not the user exists.
+    """
+    generate_password_hash, _ = _hashers()
+    return generate_password_hash("dummy", method=HASH_METHOD)
+
+# Long-lived connections are reused across requests instead of reopening the
+# database file every time. Sharing is safe because each connection is only
+# ever borrowed by one request at a time. SELECT-only routes draw from a
+# separate pool of mode=ro connections so WAL readers never contend with
+# the writer side for a connection.
+_POOL = queue.LifoQueue(maxsize=8)
+_READ_POOL = queue.LifoQueue(maxsize=8)
+
+
+def _configure(conn, readonly=False):
+    """Apply PRAGMAs once per connection instead of once per request."""
+    if not readonly:
+        # Journal-mode and durability settings need write access; readers
+        # inherit WAL from the database file itself.
+        conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA foreign_keys=ON;
+        """)
+    conn.executescript("""
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+        PRAGMA busy_timeout=30000;
+    """)
+
+
+def _new_connection(readonly=False):
+    """Create a pooled SQLite connection, configured once at creation."""
+    if readonly:
+        conn = sqlite3.connect(
+            f"file:{DATABASE}?mode=ro", uri=True,
+            check_same_thread=False, isolation_level=None,
+        )
+    else:
+        # isolation_level=None disables pysqlite's implicit transactions;
+        # write handlers open one explicit BEGIN IMMEDIATE ... COMMIT instead.
+        conn = sqlite3.connect(DATABASE, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row  # allows name-based access to columns
+    _configure(conn, readonly=readonly)
+    return conn
+
+
+def get_db(readonly=False):
+    """Borrow a pooled SQLite connection; reuse it if already borrowed.
+
+    SELECT-only handlers pass readonly=True to get a mode=ro connection;
+    anything that writes takes the default read-write pool.
+    """
+    if readonly:
+        db = getattr(g, "_database_ro", None)
+        if db is None:
+            try:
+                db = _READ_POOL.get_nowait()
+            except queue.Empty:
+                db = _new_connection(readonly=True)
+            g._database_ro = db
+        return db
 
-def get_db():
-    """Connect to SQLite database; reuse connection if already open."""
     db = getattr(g, "_database", None)
     if db is None:
-        db = g._database = sqlite3.connect(DATABASE)
-        db.row_factory = sqlite3.Row  # allows name-based access to columns
+        try:
+            db = _POOL.get_nowait()
+        except queue.Empty:
+            db = _new_connection()
+        g._database = db
     return db
 
 
 @app.teardown_appcontext
 def close_db(exception):
-    """Close the database connection at the end of the request."""
+    """Return any borrowed connections to their pools at request end."""
     db = getattr(g, "_database", None)
     if db is not None:
-        db.close()
+        db.rollback()  # discard any uncommitted state before reuse
+        try:
+            _POOL.put_nowait(db)
+        except queue.Full:
+            db.close()
+
+    db = getattr(g, "_database_ro", None)
+    if db is not None:
+        try:
+            _READ_POOL.put_nowait(db)
+        except queue.Full:
+            db.close()
+
+
+def _migrate_created_at(db):
+    """One-time rebuild of projects.created_at as INTEGER epoch seconds.
+
+    Databases created before the epoch-seconds schema declared the column
+    TEXT; CREATE TABLE IF NOT EXISTS never touches them, and TEXT affinity
+    would coerce new integer timestamps to strings that sort below the
+    old ISO-8601 rows. SQLite cannot alter a column type in place, so the
+    table is rebuilt with converted values and the index recreated.
+    """
+    col_type = next(
+        (row["type"] for row in db.execute("PRAGMA table_info(projects)")
+         if row["name"] == "created_at"),
+        None,
+    )
+    if col_type != "TEXT":
+        return
+
+    db.executescript("""
+        BEGIN IMMEDIATE;
+
+        CREATE TABLE projects_migrated (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            name_text TEXT NOT NULL,
+            month TEXT NOT NULL,
+            flower_image TEXT,
+            created_at INTEGER NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        );
+
+        INSERT INTO projects_migrated
+            SELECT id, user_id, name_text, month, flower_image,
+                   CAST(strftime('%s', created_at, 'utc') AS INTEGER)
+            FROM projects;
+
+        DROP TABLE projects;
+        ALTER TABLE projects_migrated RENAME TO projects;
+
+        CREATE INDEX IF NOT EXISTS idx_projects_user_created
+            ON projects(user_id, created_at DESC);
+
+        COMMIT;
+    """)
 
 
 def init_db():
@@ -45,11 +196,66 @@ def init_db():
             name_text TEXT NOT NULL,
             month TEXT NOT NULL,
             flower_image TEXT,
-            created_at TEXT NOT NULL,
+            created_at INTEGER NOT NULL,
             FOREIGN KEY (user_id) REFERENCES users(id)
         );
+
+        CREATE INDEX IF NOT EXISTS idx_projects_user_created
+            ON projects(user_id, created_at DESC);
     """)
-    db.commit()
+    _migrate_created_at(db)
+
+
+# ---------------- SQL Statements ---------------- #
+
+# Hoisted to module level so every call site passes the same string
+# object, keeping each pooled connection's statement cache warm.
+
+# ON CONFLICT DO NOTHING turns a duplicate username/email into
+# rowcount == 0 instead of a raised IntegrityError, keeping one code
+# path (and one cached statement) for both outcomes.
+SQL_INSERT_USER = """
+    INSERT INTO users (username, email, hash) VALUES (?, ?, ?)
+    ON CONFLICT DO NOTHING
+"""
+
+SQL_SELECT_USER_BY_NAME = "SELECT id, hash FROM users WHERE username = ?"
+
+# RETURNING id hands back the new row's key on the insert itself, so
+# the redirect can point at it without a follow-up SELECT.
+SQL_INSERT_PROJECT = """
+    INSERT INTO projects (user_id, name_text, month, flower_image, created_at)
+    VALUES (?, ?, ?, ?, ?)
+    RETURNING id
+"""
+
+# Eager-load contract: everything the template may reference per row
+# (including the owner) comes back from this one query. Do not add
+# per-row db.execute calls from the template.
+SQL_SELECT_PROJECTS_FOR_USER = """
+    SELECT p.id, p.name_text, p.month, p.flower_image, p.created_at, u.username
+    FROM projects p JOIN users u ON u.id = p.user_id
+    WHERE p.user_id = ? ORDER BY p.created_at DESC
+"""
+
+# Field order must match SQL_SELECT_PROJECTS_FOR_USER. Templates read
+# these via attribute access, which is a C-level slot read instead of
+# sqlite3.Row's by-name lookup.
+Project = namedtuple("Project", "id name_text month flower_image created_at username")
+
+
+# Per-user cache of the rendered project list. Write routes bump the
+# user's version; a cached list is served only while its version matches,
+# so repeat visits to /my_projects skip the query entirely.
+_PROJECTS_LOCK = threading.Lock()
+_PROJECTS_VERSION = {}  # user_id -> int, bumped on every write
+_PROJECTS_CACHE = {}    # user_id -> (version, rows)
+
+
+def _bump_projects_version(user_id):
+    """Invalidate the cached project list for a user after a write."""
+    with _PROJECTS_LOCK:
+        _PROJECTS_VERSION[user_id] = _PROJECTS_VERSION.get(user_id, 0) + 1
 
 
 # ---------------- Utility ---------------- #
@@ -59,6 +265,77 @@ def logged_in():
     return "user_id" in session
 
 
+@lru_cache(maxsize=16)
+def _route_url(endpoint):
+    """Cache url_for results for fixed, argument-free endpoints.
+
+    These routes have no parameters, so the built path is a per-process
+    constant; caching skips the URL-map walk on every redirect. Keep
+    plain url_for for endpoints that take arguments.
+    """
+    return url_for(endpoint)
+
+
+@lru_cache(maxsize=256)
+def _rx(find):
+    """Compile and cache a regex pattern, bypassing re's global cache."""
+    import re  # deferred: sre_compile/sre_parse are paid on first use only
+    return re.compile(find)
+
+
+@app.template_filter("regex_replace")
+def regex_replace(s, find, replace=""):
+    """Jinja filter: replace occurrences of a regex pattern in a string."""
+    return _rx(find).sub(replace, s)
+
+
+@app.template_filter("datetimeformat")
+def datetimeformat(value, fmt="%Y-%m-%d %H:%M:%S"):
+    """Jinja filter: render an epoch-seconds timestamp for display.
+
+    init_db migrates legacy ISO-8601 text rows to epoch integers, so
+    the string passthrough only covers databases that have not been
+    opened through init_db yet.
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value).strftime(fmt)
+    return value
+
+
+# The deployed flower assets are a closed set — one per month — so
+# validity is a membership test, not a filesystem question.
+_VALID_MONTHS = frozenset({
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+})
+
+
+@lru_cache(maxsize=32)
+def flower_image_path(month):
+    """Return the static image path for a birth-month flower.
+
+    The month vocabulary is tiny and the asset set is fixed, so the
+    result is memoized and each month is computed at most once.
+    Anything outside the twelve known months maps to the default image.
+    """
+    if month in _VALID_MONTHS:
+        return f"static/flowers/{month}.png"
+    return "static/flowers/default.png"
+
+
+@app.after_request
+def cache_static_assets(response):
+    """Mark flower images immutable so browsers skip conditional GETs.
+
+    Only the month PNGs qualify — one fixed file per month that never
+    changes in place. Mutable assets like styles.css are referenced
+    without cache-busting, so they keep Flask's revalidation defaults.
+    """
+    if request.path.startswith("/static/flowers/") and response.status_code == 200:
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 # ---------------- Routes ---------------- #
 
 @app.route("/")
@@ -70,26 +347,33 @@ def home():
 def register():
     """User registration route."""
     if request.method == "POST":
-        username = request.form.get("username")
-        email = request.form.get("email")
-        password = request.form.get("password")
-
-        if not username or not email or not password:
+        username = request.form.get("username", "")
+        email = request.form.get("email", "")
+        password = request.form.get("password", "")
+
+        if not _rx(USERNAME_PATTERN).match(username):
+            return "Invalid username.", 400
+        if not _rx(EMAIL_PATTERN).match(email):
+            return "Invalid email address.", 400
+        if not password:
             return "All fields required.", 400
 
-        hash_pw = generate_password_hash(password)
+        generate_password_hash, _ = _hashers()
+        hash_pw = generate_password_hash(password, method=HASH_METHOD)
 
         db = get_db()
         try:
-            db.execute(
-                "INSERT INTO users (username, email, hash) VALUES (?, ?, ?)",
-                (username, email, hash_pw),
-            )
-            db.commit()
-        except sqlite3.IntegrityError:
+            db.execute("BEGIN IMMEDIATE")
+            cur = db.execute(SQL_INSERT_USER, (username, email, hash_pw))
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+
+        if cur.rowcount == 0:
             return "Username or email already exists.", 400
 
-        return redirect(url_for("login"))
+        return redirect(_route_url("login"))
 
     return render_template("register.html")
 
@@ -98,17 +382,28 @@ def register():
 def login():
     """Login route with password verification."""
     if request.method == "POST":
-        username = request.form.get("username")
-        password = request.form.get("password")
+        username = request.form.get("username", "")
+        password = request.form.get("password", "")
 
-        db = get_db()
-        user = db.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
+        # Fast-reject empty credentials before the DB probe and hashing.
+        if not username or not password:
+            return "Invalid username or password", 403
+
+        db = get_db(readonly=True)
+        user = db.execute(SQL_SELECT_USER_BY_NAME, (username,)).fetchone()
 
-        if user is None or not check_password_hash(user["hash"], password):
+        _, check_password_hash = _hashers()
+        if user is None:
+            # Burn the same hash cost as a real verification so timing
+            # does not reveal whether the username exists.
+            check_password_hash(_dummy_hash(), password)
+            return "Invalid username or password", 403
+
+        if not check_password_hash(user["hash"], password):
             return "Invalid username or password", 403
 
         session["user_id"] = user["id"]
-        return redirect(url_for("design"))
+        return redirect(_route_url("design"))
 
     return render_template("login.html")
 
@@ -117,14 +412,14 @@ def login():
 def logout():
     """Logout route clears session."""
     session.clear()
-    return redirect(url_for("home"))
+    return redirect(_route_url("home"))
 
 
 @app.route("/design", methods=["GET", "POST"])
 def design():
     """Design page for creating and saving flower designs."""
     if not logged_in():
-        return redirect(url_for("login"))
+        return redirect(_route_url("login"))
 
     db = get_db()
 
@@ -132,18 +427,22 @@ def design():
         # When "Save" button is clicked (not the preview)
         name = request.form.get("name")
         month = request.form.get("month")
-        flower_image = f"static/flowers/{month}.png"
-
-        db.execute(
-            """
-            INSERT INTO projects (user_id, name_text, month, flower_image, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (session["user_id"], name, month, flower_image, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
-        )
-        db.commit()
+        flower_image = flower_image_path(month)
 
-        return redirect(url_for("my_projects"))
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute(
+                SQL_INSERT_PROJECT,
+                (session["user_id"], name, month, flower_image, int(time.time())),
+            ).fetchone()
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            db.execute("ROLLBACK")
+            raise
+        _bump_projects_version(session["user_id"])
+
+        # Takes a query argument, so this redirect keeps plain url_for.
+        return redirect(url_for("my_projects", highlight=row["id"]))
 
     # For GET requests, just show design page
     return render_template("design.html")
@@ -168,15 +467,24 @@ def preview():
 def my_projects():
     """Show all saved projects for logged-in user."""
     if not logged_in():
-        return redirect(url_for("login"))
+        return redirect(_route_url("login"))
 
-    db = get_db()
-    projects = db.execute(
-        "SELECT * FROM projects WHERE user_id = ? ORDER BY created_at DESC",
-        (session["user_id"],),
-    ).fetchall()
+    user_id = session["user_id"]
+    highlight = request.args.get("highlight", type=int)
+
+    with _PROJECTS_LOCK:
+        version = _PROJECTS_VERSION.get(user_id, 0)
+        cached = _PROJECTS_CACHE.get(user_id)
+    if cached is not None and cached[0] == version:
+        return render_template("my_projects.html", projects=cached[1], highlight=highlight)
+
+    db = get_db(readonly=True)
+    projects = [Project(*row) for row in db.execute(SQL_SELECT_PROJECTS_FOR_USER, (user_id,))]
+
+    with _PROJECTS_LOCK:
+        _PROJECTS_CACHE[user_id] = (version, projects)
 
-    return render_template("my_projects.html", projects=projects)
+    return render_template("my_projects.html", projects=projects, highlight=highlight)
 
 
 # ---------------- Main Entry ---------------- #